@@ -0,0 +1,106 @@
+"""Startup benchmark for cached one-shot lookups.
+
+Seeds a throwaway cache with one lookup result, then runs
+`python -X importtime scraper.py <character> <section> <move>` against it
+and checks that the cache hit never imports the network/parsing stack and
+stays within the import-time budget. Exits non-zero if either check fails.
+
+    python benchmarks/bench_startup.py [--runs N] [--budget-ms MS]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPER = os.path.join(ROOT, 'scraper.py')
+
+# Modules that must only be loaded on a cache miss
+HEAVY_MODULES = ('requests', 'bs4', 'urllib3', 'concurrent', 'logging.handlers')
+
+CHARACTER, SECTION, MOVE = 'Vikala', 'Skills', '22L'
+RESULT = {
+    'frame_data': {'Damage': '800', 'Startup': '18'},
+    'frame_chart': {},
+    'additional_data': {},
+    'overview': [[['text', 'Benchmark entry.']]],
+    'usage': [],
+    'image_url': None,
+    'hitbox_url': None
+}
+
+
+def seed_cache(cache_dir):
+    os.environ['SCRAPER_CACHE_DIR'] = cache_dir
+    sys.path.insert(0, ROOT)
+    import scraper_cache
+    scraper_cache.store_page(CHARACTER, b'<html><script>"wgCurRevisionId":1</script></html>')
+    scraper_cache.store_result(CHARACTER, SECTION, MOVE, RESULT)
+
+
+def run_lookup(work_dir, env, importtime=False):
+    args = [sys.executable]
+    if importtime:
+        args += ['-X', 'importtime']
+    args += [SCRAPER, CHARACTER, SECTION, MOVE]
+    start = time.perf_counter()
+    proc = subprocess.run(args, cwd=work_dir, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if json.loads(proc.stdout) != RESULT:
+        raise SystemExit(f"Lookup was not served from the cache:\n{proc.stdout}\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def parse_importtime(stderr):
+    """Return {module: (cumulative microseconds, nesting depth)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(cumulative), depth)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help="timed runs of the cached lookup")
+    parser.add_argument('--budget-ms', type=float, default=30, help="max time spent importing the project's modules")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache_dir = os.path.join(work_dir, 'cache')
+        seed_cache(cache_dir)
+        env = dict(os.environ, SCRAPER_CACHE_DIR=cache_dir)
+
+        _, stderr = run_lookup(work_dir, env, importtime=True)
+        modules = parse_importtime(stderr)
+        heavy = sorted({m for m in HEAVY_MODULES if any(name == m or name.startswith(m + '.') for name in modules)})
+        # Top-level project modules include the cost of everything they pull in
+        project_us = sum(modules[m][0] for m in ('scraper_cache', 'scraper_logging') if m in modules)
+        total_us = sum(us for us, depth in modules.values() if depth == 0)
+
+        wall = [run_lookup(work_dir, env)[0] * 1000 for _ in range(args.runs)]
+
+    print(f"cached lookup wall time: median {statistics.median(wall):.1f} ms, "
+          f"min {min(wall):.1f} ms over {args.runs} runs")
+    print(f"imports: {total_us / 1000:.1f} ms total, {project_us / 1000:.1f} ms in project modules "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: cache hit imported {', '.join(heavy)}")
+        failed = True
+    if project_us / 1000 > args.budget_ms:
+        print("FAIL: project imports are over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import sys
+import time
+import heapq
+import random
+import logging
+import argparse
+from collections import deque
+from bs4 import BeautifulSoup
+from requests.exceptions import RequestException
+import scraper
+import scraper_cache
+import scraper_logging
+from scraper_logging import request_context, stage
+
+logger = logging.getLogger(__name__)
+
+# Defaults, all overridable from the command line
+WARM_TOP = 10                  # How many of the most requested characters to keep warm
+LOOKUPS_PER_CHARACTER = 25     # How many of each character's popular moves to pre-index
+IMAGE_MOVES_PER_REFRESH = 10   # How many other moves' images to index per refresh
+REFRESH_INTERVAL = 30 * 60     # Seconds between refreshes of one character
+REFRESH_JITTER = 0.2           # +/- fraction applied to every refresh so they don't line up
+RETRY_DELAY = 5 * 60           # Seconds before retrying a character whose refresh failed
+RERANK_INTERVAL = 10 * 60      # Seconds between re-reading the lookup history
+BUDGET_REQUESTS = 120          # At most this many requests to Dustloop (pages and image checks)...
+BUDGET_PERIOD = 60 * 60        # ...per this many seconds
+
+
+class RequestBudget:
+    """Sliding-window limit on how many requests the scheduler sends to Dustloop"""
+
+    def __init__(self, max_requests, period):
+        self.max_requests = max_requests
+        self.period = period
+        self.sent = deque()
+
+    def wait_time(self, now=None):
+        now = time.time() if now is None else now
+        while self.sent and now - self.sent[0] >= self.period:
+            self.sent.popleft()
+        if len(self.sent) < self.max_requests:
+            return 0
+        return self.sent[0] + self.period - now
+
+    def acquire(self):
+        """Block until a request can be sent, then count it"""
+        delay = self.wait_time()
+        while delay > 0:
+            logger.info("Request budget used up, waiting %.0fs", delay)
+            time.sleep(delay)
+            delay = self.wait_time()
+        self.sent.append(time.time())
+
+
+def warm_character(character, lookups, budget, image_moves=IMAGE_MOVES_PER_REFRESH):
+    """Fetch a character page, pre-build its popular lookups and index more of its images
+
+    Every request sent, the page and each image check, is charged to the budget.
+    """
+    budget.acquire()
+    page = scraper.fetch_page(character, use_cache=False)
+    if page is None:
+        return 0
+
+    with stage('parse'):
+        soup = BeautifulSoup(page, 'html.parser')
+    warmed = 0
+    for section, subsection in lookups:
+        result = scraper.lookup_move(soup, character, section, subsection, budget.acquire)
+        if 'error' not in result and scraper.images_verified(result['images']):
+            scraper_cache.store_result(character, section, subsection, result)
+            warmed += 1
+    scraper.index_page_images(soup, character, image_moves, budget.acquire)
+    return warmed
+
+
+class WarmupScheduler:
+    """Keeps the most requested characters cached, refreshing them on a jittered timer"""
+
+    def __init__(self, top=WARM_TOP, interval=REFRESH_INTERVAL, jitter=REFRESH_JITTER,
+                 budget=None, lookups_per_character=LOOKUPS_PER_CHARACTER, image_moves=IMAGE_MOVES_PER_REFRESH):
+        self.top = top
+        self.interval = interval
+        self.jitter = jitter
+        self.budget = budget or RequestBudget(BUDGET_REQUESTS, BUDGET_PERIOD)
+        self.lookups_per_character = lookups_per_character
+        self.image_moves = image_moves
+        self.queue = []          # heap of (due time, order, character)
+        self.tracked = {}        # character -> popularity rank
+        self.due = {}            # character -> due time of its live queue entry
+        self.history = []
+        self.next_rerank = 0
+
+    def next_delay(self, base):
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def schedule(self, character, due, rank):
+        self.due[character] = due
+        heapq.heappush(self.queue, (due, rank, character))
+
+    def rerank(self):
+        """Re-read the lookup history and start tracking newly popular characters"""
+        self.history = scraper_cache.load_history()
+        ranked = scraper_cache.rank_characters(self.history)[:self.top]
+        now = time.time()
+        for rank, character in enumerate(ranked):
+            if character not in self.tracked:
+                # New characters are warmed straight away, most popular first
+                self.schedule(character, now, rank)
+        self.tracked = {character: rank for rank, character in enumerate(ranked)}
+        self.next_rerank = now + RERANK_INTERVAL
+        logger.info("Keeping warm: %s", ', '.join(ranked) or 'nothing yet')
+
+    def refresh(self, character):
+        lookups = scraper_cache.popular_lookups(self.history, character, self.lookups_per_character)
+        with request_context():
+            try:
+                warmed = warm_character(character, lookups, self.budget, self.image_moves)
+            except RequestException as e:
+                logger.error("Could not refresh %s: %s", character, e)
+                return self.next_delay(RETRY_DELAY)
+            except Exception as e:
+                # One bad character must not stop warm-up for the others
+                logger.error("Unexpected error refreshing %s: %s", character, e, exc_info=True)
+                return self.next_delay(RETRY_DELAY)
+            logger.info("Refreshed %s (%s/%s lookups indexed)", character, warmed, len(lookups))
+        return self.next_delay(self.interval)
+
+    def run_once(self):
+        """Warm every tracked character once, most popular first"""
+        self.rerank()
+        for character in sorted(self.tracked, key=self.tracked.get):
+            self.refresh(character)
+
+    def run(self):
+        self.rerank()
+        while True:
+            if time.time() >= self.next_rerank:
+                self.rerank()
+            if not self.queue:
+                time.sleep(max(0, self.next_rerank - time.time()))
+                continue
+
+            due, _, character = self.queue[0]
+            wait = min(due, self.next_rerank) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+
+            heapq.heappop(self.queue)
+            if character not in self.tracked or self.due.get(character) != due:
+                # Dropped out of the top characters, or superseded by a newer entry
+                continue
+            delay = self.refresh(character)
+            if character in self.tracked:
+                self.schedule(character, time.time() + delay, self.tracked[character])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fetch and keep popular characters warm in the scraper cache")
+    parser.add_argument('--top', type=int, default=WARM_TOP, help="number of characters to keep warm")
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL, help="seconds between refreshes")
+    parser.add_argument('--jitter', type=float, default=REFRESH_JITTER, help="refresh jitter as a fraction of the interval")
+    parser.add_argument('--budget', type=int, default=BUDGET_REQUESTS, help="max requests to Dustloop per budget period")
+    parser.add_argument('--budget-period', type=float, default=BUDGET_PERIOD, help="budget period in seconds")
+    parser.add_argument('--image-moves', type=int, default=IMAGE_MOVES_PER_REFRESH, help="moves whose images are indexed per refresh, besides the popular ones")
+    parser.add_argument('--once', action='store_true', help="warm the popular characters once and exit")
+    args = parser.parse_args()
+    scraper_logging.setup_logging()
+
+    scheduler = WarmupScheduler(
+        top=args.top,
+        interval=args.interval,
+        jitter=args.jitter,
+        budget=RequestBudget(args.budget, args.budget_period),
+        image_moves=args.image_moves
+    )
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            scheduler.run()
+    except KeyboardInterrupt:
+        sys.exit(0)
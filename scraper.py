@@ -1,21 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
 import sys
 import logging
 import json
 import re
-from requests.exceptions import RequestException
-from urllib3.exceptions import HTTPError
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('scraper.log')
-    ]
-)
+import struct
+# Only stdlib modules are imported up front so cached lookups start fast;
+# requests and bs4 are imported by the functions that need them.
+import scraper_cache
+import scraper_logging
+from scraper_logging import request_context, stage
 logger = logging.getLogger(__name__)
 
+IMAGE_VERIFY_WORKERS = 8
+IMAGE_VERIFY_TIMEOUT = 5
+IMAGE_HEADER_BYTES = 64 * 1024  # Enough of the file to read its dimensions
+
 def normalize_title(title):
     """Normalize title for easier comparison"""
     if not title:
@@ -67,11 +65,11 @@ def normalize_title(title):
 
 def find_move_section(soup, section_name, subsection_name):
     """Find a specific section and subsection in the HTML"""
-    logger.debug(f"Looking for section '{section_name}' and subsection '{subsection_name}'")
+    logger.debug("Looking for section '%s' and subsection '%s'", section_name, subsection_name)
     
     # Normalize the subsection name for comparison
     normalized_subsection = normalize_title(subsection_name)
-    logger.debug(f"Normalized subsection name: {normalized_subsection}")
+    logger.debug("Normalized subsection name: %s", normalized_subsection)
     
     # Find the section header
     section_header = None
@@ -81,7 +79,7 @@ def find_move_section(soup, section_name, subsection_name):
             break
     
     if not section_header:
-        logger.error(f"Section '{section_name}' not found")
+        logger.error("Section '%s' not found", section_name)
         return None
     
     # Get the section content
@@ -96,7 +94,7 @@ def find_move_section(soup, section_name, subsection_name):
             section_content = parent
     
     if not section_content:
-        logger.error(f"Could not find section content for '{section_name}'")
+        logger.error("Could not find section content for '%s'", section_name)
         return None
     
     # Find all possible headers (h3, h4, h5) in this section
@@ -104,69 +102,71 @@ def find_move_section(soup, section_name, subsection_name):
     for tag in ['h3', 'h4', 'h5']:
         all_headers.extend(section_content.find_all(tag))
     
-    logger.debug(f"Found {len(all_headers)} possible move headers")
+    logger.debug("Found %s possible move headers", len(all_headers))
     
     # Try to find the specific move subsection with exact or normalized match
     target_header = None
+    debug = logger.isEnabledFor(logging.DEBUG)
     for header in all_headers:
         header_text = header.text.strip()
         
         # Debug log each header we check
-        logger.debug(f"Checking header: '{header_text}' normalized as '{normalize_title(header_text)}'")
+        if debug:
+            logger.debug("Checking header: '%s' normalized as '%s'", header_text, normalize_title(header_text))
         
         # Special case for special moves like 236L
         if normalized_subsection in ['236l', '236m', '236h', '214l', '214m', '214h', '623l', '623m', '623h', '22l', '22m', '22h']:
             # Check if header contains the move notation
             if normalized_subsection in normalize_title(header_text):
                 target_header = header
-                logger.debug(f"Found special move match: {header_text}")
+                logger.debug("Found special move match: %s", header_text)
                 break
             
             # Check for move name matches
             if normalized_subsection in ['236l', '236m', '236h'] and ('dream attraction' in header_text.lower() or 'dream come true' in header_text.lower()):
                 target_header = header
-                logger.debug(f"Found Dream Attraction/Dream Come True match: {header_text}")
+                logger.debug("Found Dream Attraction/Dream Come True match: %s", header_text)
                 break
             elif normalized_subsection in ['623l', '623m', '623h'] and 'rodent rhythm' in header_text.lower():
                 target_header = header
-                logger.debug(f"Found Rodent Rhythm match: {header_text}")
+                logger.debug("Found Rodent Rhythm match: %s", header_text)
                 break
             elif normalized_subsection in ['214l', '214m', '214h'] and 'ring the dormouse' in header_text.lower():
                 target_header = header
-                logger.debug(f"Found Ring the Dormouse match: {header_text}")
+                logger.debug("Found Ring the Dormouse match: %s", header_text)
                 break
             elif normalized_subsection in ['22l', '22m', '22h'] and 'marching teeth' in header_text.lower():
                 target_header = header
-                logger.debug(f"Found Marching Teeth match: {header_text}")
+                logger.debug("Found Marching Teeth match: %s", header_text)
                 break
         else:
             # Normal case - check for exact or normalized match
             if header_text == subsection_name or normalize_title(header_text) == normalized_subsection:
                 target_header = header
-                logger.debug(f"Found match: {header_text}")
+                logger.debug("Found match: %s", header_text)
                 break
     
     if not target_header:
-        logger.error(f"Subsection '{subsection_name}' not found in '{section_name}'")
+        logger.error("Subsection '%s' not found in '%s'", subsection_name, section_name)
         return None
     
     # Find the attack container for this move
     attack_container = target_header.find_next('div', class_='attack-container')
     if not attack_container:
-        logger.error(f"Could not find attack container for '{subsection_name}'")
+        logger.error("Could not find attack container for '%s'", subsection_name)
         
         # Try a different approach - look for any div containing the move data
         # that follows the target header
         container = target_header.parent
         if container and container.name == 'div':
             attack_container = container
-            logger.debug(f"Found alternative container for move data")
+            logger.debug("Found alternative container for move data")
         else:
             # Look for any div following the header that might contain move data
             next_div = target_header.find_next('div')
             if next_div:
                 attack_container = next_div
-                logger.debug(f"Using next div as move container")
+                logger.debug("Using next div as move container")
     
     return attack_container
 
@@ -213,7 +213,7 @@ def extract_frame_data(content):
                                 value = cells[1].text.strip()
                                 frame_data[key] = value
         except Exception as e:
-            logger.error(f"Error in alternative frame data extraction: {str(e)}")
+            logger.error("Error in alternative frame data extraction: %s", e)
     
     return frame_data
 
@@ -301,7 +301,7 @@ def extract_overview(content):
         first_p = attack_info.find('p')
         if first_p:
             overview.append(extract_text_with_tooltips(first_p))
-            logger.debug(f"Extracted paragraph: {overview[-1]}")
+            logger.debug("Extracted paragraph: %s", overview[-1])
     
     return overview
 
@@ -328,12 +328,12 @@ def extract_usage(content):
                 extracted = extract_text_with_tooltips(element)
                 usage.append(('paragraph', extracted))
                 paragraphs_processed.add(element)
-                logger.debug(f"Extracted paragraph: {extracted}")
+                logger.debug("Extracted paragraph: %s", extracted)
             elif element.name == 'ul':
                 for li in element.find_all('li'):
                     extracted = extract_text_with_tooltips(li)
                     usage.append(('list', extracted))
-                    logger.debug(f"Extracted list item: {extracted}")
+                    logger.debug("Extracted list item: %s", extracted)
     
     return usage
 
@@ -412,9 +412,9 @@ def extract_text_with_tooltips(element):
     
     return result
 
-def extract_images(content):
-    """Extract both standard and hitbox images from content."""
-    images = {
+def find_image_tags(content):
+    """Find the <img> tags for the standard and hitbox images of a move."""
+    tags = {
         'standard': None,
         'hitbox': None
     }
@@ -440,38 +440,33 @@ def extract_images(content):
                 img_tag = panel.find('img')
                 
             if img_tag and 'src' in img_tag.attrs:
-                img_url = "https://www.dustloop.com" + img_tag['src']
-                # Fix malformed URLs
-                img_url = correct_image_url(img_url)
-                # Convert thumbnail URL to full resolution
-                if 'thumb' in img_url:
-                    img_url = convert_thumbnail_to_full_res(img_url)
-                
                 # Assign to appropriate category
-                if is_hitbox or 'Hitbox' in img_url:
-                    images['hitbox'] = img_url
+                if is_hitbox or 'Hitbox' in img_tag['src']:
+                    tags['hitbox'] = img_tag
                 else:
-                    images['standard'] = img_url
+                    tags['standard'] = img_tag
     
     # If we couldn't find images in gallery, try looking elsewhere
-    if not images['standard'] and not images['hitbox']:
+    if not tags['standard'] and not tags['hitbox']:
         img_tags = content.find_all('img')
         for img_tag in img_tags:
             if 'src' in img_tag.attrs:
-                img_url = "https://www.dustloop.com" + img_tag['src']
-                # Fix malformed URLs
-                img_url = correct_image_url(img_url)
-                # Convert thumbnail URL to full resolution
-                if 'thumb' in img_url:
-                    img_url = convert_thumbnail_to_full_res(img_url)
-                
                 # Determine if this is a hitbox image or standard image
-                if 'Hitbox' in img_url:
-                    images['hitbox'] = img_url
+                if 'Hitbox' in img_tag['src']:
+                    tags['hitbox'] = img_tag
                 else:
-                    images['standard'] = img_url
+                    tags['standard'] = img_tag
     
-    return images
+    return tags
+
+def image_url_from_tag(img_tag):
+    img_url = "https://www.dustloop.com" + img_tag['src']
+    # Fix malformed URLs
+    img_url = correct_image_url(img_url)
+    # Convert thumbnail URL to full resolution
+    if 'thumb' in img_url:
+        img_url = convert_thumbnail_to_full_res(img_url)
+    return img_url
 
 def convert_thumbnail_to_full_res(img_url):
     # For Dustloop wiki thumbnail URLs
@@ -513,9 +508,188 @@ def correct_image_url(url):
     
     return url
 
+def image_candidates(img_tag):
+    """Possible URLs for an image with their known dimensions, full resolution first"""
+    page_url = "https://www.dustloop.com" + img_tag['src']
+    full_res_url = image_url_from_tag(img_tag)
+    thumbnail = (page_url, img_tag.get('width'), img_tag.get('height'))
+    if full_res_url == page_url:
+        return [thumbnail]
+    # The full-resolution size is only known once the file itself is checked
+    return [(full_res_url, None, None), thumbnail]
+
+def image_size(data):
+    """Width and height read from the first bytes of a PNG, GIF, WebP or JPEG file"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3fff, height & 0x3fff
+    if data[:2] == b'\xff\xd8':
+        # Walk the JPEG segments up to the start-of-frame marker
+        i = 2
+        while i + 9 <= len(data):
+            if data[i] != 0xff:
+                return None
+            marker = data[i + 1]
+            if marker == 0xff:
+                i += 1
+                continue
+            if marker in (0x01, 0xd8) or 0xd0 <= marker <= 0xd7:
+                i += 2
+                continue
+            if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+                height, width = struct.unpack('>HH', data[i + 5:i + 9])
+                return width, height
+            i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
+
+def check_image_url(session, url):
+    """Fetch the start of an image file
+
+    Returns ('ok', (width, height) or None), ('broken', None) when the URL
+    definitely doesn't serve an image, or ('unknown', None) when the check
+    itself failed (timeouts, rate limiting, server errors).
+    """
+    try:
+        headers = {'Range': f"bytes=0-{IMAGE_HEADER_BYTES - 1}"}
+        with session.get(url, headers=headers, stream=True, timeout=IMAGE_VERIFY_TIMEOUT) as response:
+            if response.status_code in (404, 410):
+                return 'broken', None
+            if response.status_code not in (200, 206):
+                return 'unknown', None
+            if not response.headers.get('Content-Type', '').startswith('image/'):
+                return 'broken', None
+            return 'ok', image_size(response.raw.read(IMAGE_HEADER_BYTES, decode_content=True))
+    except Exception as e:
+        logger.debug("Image check failed for %s: %s", url, e)
+        return 'unknown', None
+
+def verify_image_urls(urls, before_request=None):
+    """Check image URLs concurrently over a pooled session, returning {url: (status, size)}
+
+    before_request, if given, is called before each check is sent (the
+    scheduler uses it to charge its request budget).
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    
+    import contextvars
+    import requests
+    from requests.adapters import HTTPAdapter
+    from concurrent.futures import ThreadPoolExecutor
+    
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=IMAGE_VERIFY_WORKERS)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers=IMAGE_VERIFY_WORKERS) as pool:
+            # Run each check in a copy of this context so its logs keep the request id, stage and sample draw
+            futures = []
+            for url in urls:
+                if before_request:
+                    before_request()
+                futures.append(pool.submit(contextvars.copy_context().run, check_image_url, session, url))
+            results = [future.result() for future in futures]
+    
+    return dict(zip(urls, results))
+
+def _dimension(value):
+    return int(value) if value and str(value).isdigit() else None
+
+def resolve_images(candidates_by_move, before_request=None):
+    """Pick the first working candidate for every image of every move
+
+    Images whose check was inconclusive fall back to their preferred URL and
+    are marked unverified so they are not cached.
+    """
+    pending = {
+        (move, kind): candidates
+        for move, images in candidates_by_move.items()
+        for kind, candidates in images.items()
+        if candidates
+    }
+    resolved = {}
+    # Check every move's preferred URL in one batch, then the fallbacks of the ones that are broken
+    while pending:
+        checks = verify_image_urls((candidates[0][0] for candidates in pending.values()), before_request)
+        next_pending = {}
+        for image, candidates in pending.items():
+            url, width, height = candidates[0]
+            status, size = checks[url]
+            if status == 'ok':
+                if size:
+                    width, height = size
+                resolved[image] = {'url': url, 'width': _dimension(width), 'height': _dimension(height), 'verified': True}
+            elif status == 'unknown':
+                resolved[image] = {'url': url, 'width': _dimension(width), 'height': _dimension(height), 'verified': False}
+            elif len(candidates) > 1:
+                next_pending[image] = candidates[1:]
+            else:
+                logger.warning("No working URL for %s image of %s", image[1], image[0])
+        pending = next_pending
+    
+    return {
+        move: {kind: resolved.get((move, kind)) for kind in images}
+        for move, images in candidates_by_move.items()
+    }
+
+def images_verified(images):
+    """True if every image of a move is either verified or definitely missing"""
+    return all(image is None or image['verified'] for image in images.values())
+
+def move_key(container):
+    """Key identifying the move an attack container belongs to"""
+    header = container.find_previous(['h3', 'h4', 'h5'])
+    section = container.find_previous('h2')
+    if not header:
+        return None
+    return f"{normalize_title(section.text if section else '')}|{normalize_title(header.text.strip())}"
+
+def move_image_candidates(container):
+    return {
+        kind: image_candidates(img_tag) if img_tag else []
+        for kind, img_tag in find_image_tags(container).items()
+    }
+
+def index_page_images(soup, character, limit=None, before_request=None):
+    """Verify the images of the moves on the page that aren't in its image index yet
+
+    This checks every image on the page (or of the first limit moves), so it
+    is left to the warm-up scheduler; lookups only verify the move they ask for.
+    """
+    image_index = scraper_cache.load_images(character) or {}
+    candidates_by_move = {}
+    for container in soup.find_all('div', class_='attack-container'):
+        key = move_key(container)
+        if key is None or key in image_index or key in candidates_by_move:
+            continue
+        candidates_by_move[key] = move_image_candidates(container)
+        if limit is not None and len(candidates_by_move) >= limit:
+            break
+    if not candidates_by_move:
+        return 0
+    
+    logger.debug("Resolving images for %s moves", len(candidates_by_move))
+    with stage('images'):
+        resolved = resolve_images(candidates_by_move, before_request)
+    # Moves with inconclusive checks are left out so they are re-checked on their next lookup
+    verified = {key: images for key, images in resolved.items() if images_verified(images)}
+    store_quietly(scraper_cache.store_images, character, verified)
+    return len(verified)
+
 def find_section_with_fallbacks(soup, section_name, subsection_name):
     """Try multiple section names to find the right content"""
-    logger.debug(f"Attempting to find section with fallbacks for '{section_name}' and subsection '{subsection_name}'")
+    logger.debug("Attempting to find section with fallbacks for '%s' and subsection '%s'", section_name, subsection_name)
     
     # Try standard section name first
     content = find_move_section(soup, section_name, subsection_name)
@@ -537,10 +711,10 @@ def find_section_with_fallbacks(soup, section_name, subsection_name):
     
     # Try each fallback section
     for fallback in fallback_sections:
-        logger.debug(f"Trying fallback section: '{fallback}'")
+        logger.debug("Trying fallback section: '%s'", fallback)
         content = find_move_section(soup, fallback, subsection_name)
         if content:
-            logger.debug(f"Found content using fallback section: '{fallback}'")
+            logger.debug("Found content using fallback section: '%s'", fallback)
             return content
     
     # If that doesn't work, try searching for the subsection directly
@@ -560,7 +734,7 @@ def find_section_with_fallbacks(soup, section_name, subsection_name):
                 normalize_title(header_text) == normalized_subsection or
                 subsection_name.lower() in header_text.lower()):
                 
-                logger.debug(f"Found header matching subsection directly: '{header_text}'")
+                logger.debug("Found header matching subsection directly: '%s'", header_text)
                 
                 # Find the attack container for this move
                 attack_container = header.find_next('div', class_='attack-container')
@@ -577,67 +751,147 @@ def find_section_with_fallbacks(soup, section_name, subsection_name):
     # Nothing found
     return None
 
-def scrape_dustloop(character, section, subsection):
+def lookup_images(content, character, before_request=None):
+    """Verified images for a move, checked once per page revision and then read from the image index"""
+    key = None
+    if 'attack-container' in content.get('class', []):
+        key = move_key(content)
+    if key is not None:
+        image_index = scraper_cache.load_images(character) or {}
+        if key in image_index:
+            return image_index[key]
+    
+    # Only this move is checked; a fallback match (key None) is never indexed
+    with stage('images'):
+        images = resolve_images({key: move_image_candidates(content)}, before_request)[key]
+    if key is not None and images_verified(images):
+        store_quietly(scraper_cache.store_images, character, {key: images})
+    return images
+
+def store_quietly(store, character, *args):
+    """Write to the cache without failing the lookup when the write doesn't work"""
+    try:
+        store(character, *args)
+    except OSError as e:
+        # The cache only speeds lookups up, never fail a lookup over it
+        logger.warning("Cache write %s failed for %s: %s", store.__name__, character, e)
+
+def fetch_page(character, use_cache=True):
+    """Get a character page, from the local cache when it is still fresh"""
+    with stage('fetch'):
+        return _fetch_page(character, use_cache)
+
+def _fetch_page(character, use_cache):
+    if use_cache:
+        content = scraper_cache.load_page(character)
+        if content is not None:
+            logger.debug("Using cached page for %s", character)
+            return content
+    
+    import requests
+    
     url = f"https://www.dustloop.com/w/GBVSR/{character}"
-    logger.info(f"Scraping data for {character} - {section} {subsection}")
-    logger.debug(f"URL: {url}")
+    logger.debug("URL: %s", url)
     
+    response = requests.get(url, timeout=10)  # Add timeout
+    if response.status_code == 404:
+        logger.error("Character page not found: %s", url)
+        return None
+    response.raise_for_status()  # Raise exception for bad status codes
+    
+    store_quietly(scraper_cache.store_page, character, response.content)
+    return response.content
+
+def lookup_move(soup, character, section, subsection, before_request=None):
+    """Extract a single move's data from an already parsed character page"""
+    with stage('extract'):
+        return _lookup_move(soup, character, section, subsection, before_request)
+
+def _lookup_move(soup, character, section, subsection, before_request):
+    # Check if page exists but is empty/redirect
+    if soup.find(text=re.compile("There is currently no text in this page")):
+        logger.error("Empty wiki page for character: %s", character)
+        return {"error": f"No data available for character '{character}'"}
+    
+    # Use the improved function to find move section with fallbacks
+    content = find_section_with_fallbacks(soup, section, subsection)
+    
+    if not content:
+        logger.error("Could not find content for %s's %s %s", character, section, subsection)
+        return {"error": f"Move '{subsection}' not found in section '{section}' for {character}"}
+    
+    # Extract all the data
     try:
-        response = requests.get(url, timeout=10)  # Add timeout
-        response.raise_for_status()  # Raise exception for bad status codes
+        frame_data = extract_frame_data(content)
+        frame_chart = extract_frame_chart_data(content)
+        additional_data = extract_additional_data(content)
+        overview = extract_overview(content)
+        usage = extract_usage(content)
+        images = lookup_images(content, character, before_request)
         
-        if response.status_code == 404:
-            logger.error(f"Character page not found: {url}")
-            return {"error": f"Character '{character}' not found on Dustloop Wiki"}
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Validate that we got at least some data
+        if not frame_data and not overview and not usage:
+            logger.warning("No data extracted for %s's %s", character, subsection)
+            return {"error": f"No frame data or move information found for {character}'s {subsection}"}
         
-        # Check if page exists but is empty/redirect
-        if soup.find(text=re.compile("There is currently no text in this page")):
-            logger.error(f"Empty wiki page for character: {character}")
-            return {"error": f"No data available for character '{character}'"}
+        return {
+            'frame_data': frame_data,
+            'frame_chart': frame_chart,
+            'additional_data': additional_data,
+            'overview': overview,
+            'usage': usage,
+            'image_url': images['standard']['url'] if images['standard'] else None,
+            'hitbox_url': images['hitbox']['url'] if images['hitbox'] else None,
+            'images': images
+        }
         
-        # Use the improved function to find move section with fallbacks
-        content = find_section_with_fallbacks(soup, section, subsection)
-        
-        if not content:
-            logger.error(f"Could not find content for {character}'s {section} {subsection}")
-            return {"error": f"Move '{subsection}' not found in section '{section}' for {character}"}
+    except Exception as e:
+        logger.error("Error extracting data: %s", e, exc_info=True)
+        return {"error": f"Error processing move data: {str(e)}"}
+
+def cached_lookup(character, section, subsection):
+    """Record a lookup and answer it from the result cache if possible (stdlib only)"""
+    try:
+        scraper_cache.record_lookup(character, section, subsection)
+    except OSError as e:
+        # The history only feeds warm-up ranking, never fail a lookup over it
+        logger.debug("Could not record lookup: %s", e)
+    return scraper_cache.load_result(character, section, subsection)
+
+def scrape_uncached(character, section, subsection, request_id=None):
+    """Look a move up from the character page, fetching the page if needed"""
+    from bs4 import BeautifulSoup
+    from requests.exceptions import RequestException
+    
+    with request_context(request_id):
+        logger.info("Scraping data for %s - %s %s", character, section, subsection)
         
-        # Extract all the data
         try:
-            frame_data = extract_frame_data(content)
-            frame_chart = extract_frame_chart_data(content)
-            additional_data = extract_additional_data(content)
-            overview = extract_overview(content)
-            usage = extract_usage(content)
-            images = extract_images(content)
-            
-            # Validate that we got at least some data
-            if not frame_data and not overview and not usage:
-                logger.warning(f"No data extracted for {character}'s {subsection}")
-                return {"error": f"No frame data or move information found for {character}'s {subsection}"}
+            page = fetch_page(character)
+            if page is None:
+                return {"error": f"Character '{character}' not found on Dustloop Wiki"}
             
-            return {
-                'frame_data': frame_data,
-                'frame_chart': frame_chart,
-                'additional_data': additional_data,
-                'overview': overview,
-                'usage': usage,
-                'image_url': images['standard'],
-                'hitbox_url': images['hitbox']
-            }
+            with stage('parse'):
+                soup = BeautifulSoup(page, 'html.parser')
+            result = lookup_move(soup, character, section, subsection)
+            if 'error' not in result and images_verified(result['images']):
+                store_quietly(scraper_cache.store_result, character, section, subsection, result)
+            return result
             
+        except RequestException as e:
+            logger.error("Request error: %s", e, exc_info=True)
+            return {"error": "Failed to connect to Dustloop Wiki. Please try again later."}
         except Exception as e:
-            logger.error(f"Error extracting data: {str(e)}", exc_info=True)
-            return {"error": f"Error processing move data: {str(e)}"}
-            
-    except RequestException as e:
-        logger.error(f"Request error: {str(e)}", exc_info=True)
-        return {"error": "Failed to connect to Dustloop Wiki. Please try again later."}
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return {"error": "An unexpected error occurred. Please try again later."}
+            logger.error("Unexpected error: %s", e, exc_info=True)
+            return {"error": "An unexpected error occurred. Please try again later."}
+
+def scrape_dustloop(character, section, subsection, request_id=None):
+    # Characters kept warm by the scheduler are answered straight from the cache
+    cached = cached_lookup(character, section, subsection)
+    if cached is not None:
+        logger.debug("Cache hit for %s - %s %s", character, section, subsection)
+        return cached
+    return scrape_uncached(character, section, subsection, request_id)
 
 if __name__ == "__main__":
     if len(sys.argv) != 4:
@@ -646,12 +900,17 @@ if __name__ == "__main__":
     
     try:
         character, section, subsection = sys.argv[1:]
-        result = scrape_dustloop(character, section, subsection)
+        # A cache hit is answered before logging or the network/parsing stack is set up
+        result = cached_lookup(character, section, subsection)
+        if result is None:
+            scraper_logging.setup_logging()
+            result = scrape_uncached(character, section, subsection)
         
         if result:
             print(json.dumps(result))
         else:
             print(json.dumps({"error": "Content not found"}))
     except Exception as e:
-        logger.error(f"Script error: {str(e)}", exc_info=True)
+        scraper_logging.setup_logging()
+        logger.error("Script error: %s", e, exc_info=True)
         print(json.dumps({"error": "An unexpected error occurred while running the script"}))
\ No newline at end of file
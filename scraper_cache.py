@@ -0,0 +1,348 @@
+import os
+import re
+import glob
+import json
+import time
+from collections import Counter
+
+# Everything lives under one directory so the bot, the CLI and the warm-up
+# scheduler all share the same pages, results and lookup history.
+CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', 'cache')
+PAGE_TTL = float(os.environ.get('SCRAPER_PAGE_TTL', 6 * 60 * 60))
+# Lookups are appended to HISTORY_FILE; once it passes HISTORY_MAX_BYTES it is
+# moved aside to HISTORY_PENDING_FILE and later folded into HISTORY_COMPACTED_FILE
+HISTORY_FILE = 'history.jsonl'
+HISTORY_PENDING_FILE = 'history.pending.jsonl'
+HISTORY_COMPACTED_FILE = 'history.compacted.jsonl'
+HISTORY_LOCK_FILE = 'history.lock'
+HISTORY_MAX_BYTES = int(os.environ.get('SCRAPER_HISTORY_MAX_BYTES', 1024 * 1024))
+# Seconds a moved-aside file must go unwritten before it is folded in
+HISTORY_SETTLE_TIME = 5
+# Lookups older than this, or beyond the most recent HISTORY_MAX_RECORDS, stop counting
+HISTORY_MAX_AGE = float(os.environ.get('SCRAPER_HISTORY_MAX_AGE', 30 * 24 * 60 * 60))
+HISTORY_MAX_RECORDS = int(os.environ.get('SCRAPER_HISTORY_MAX_RECORDS', 50000))
+# Lock files older than this were left behind by a process that died holding them
+LOCK_STALE_AFTER = 60
+SEED_LOG_FILE = os.environ.get('SCRAPER_LOG_FILE', 'scraper.log')
+
+# Section names the bot sends; used to split "<section> <subsection>" in log records
+KNOWN_SECTIONS = ['Normal Moves', 'Dash Normals', 'Air Normals', 'Unique Action', 'Skills']
+
+_LOG_LOOKUP_RE = re.compile(r'Scraping data for (.+?) - (.*)$')
+_REVISION_RE = re.compile(rb'"wgCurRevisionId":\s*(\d+)')
+
+
+def _path(*parts):
+    return os.path.join(CACHE_DIR, *parts)
+
+
+def _safe_name(character):
+    """Turn a character name into a file name"""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', character.strip()).lower()
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, data):
+    """Write a file so concurrent readers never see a partial write"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    encoding = None if isinstance(data, bytes) else 'utf-8'
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Don't leave half-written temp files behind in the cache
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def acquire_lock(path):
+    """Take a lock file shared between processes, returning False if it is held
+
+    A lock left behind by a process that died is cleared so the next
+    attempt can take it.
+    """
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(path) > LOCK_STALE_AFTER:
+                os.remove(path)
+        except OSError:
+            pass
+        return False
+    except OSError:
+        return False
+
+
+def release_lock(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def page_revision(content):
+    """Get the wiki revision id embedded in a page, or None if it has none"""
+    match = _REVISION_RE.search(content)
+    return match.group(1).decode() if match else None
+
+
+def result_key(section, subsection):
+    return f"{section.strip().lower()}|{subsection.strip().lower()}"
+
+
+def load_page_meta(character):
+    return _read_json(_path('pages', _safe_name(character) + '.json'))
+
+
+def is_fresh(meta, max_age=None):
+    if not meta:
+        return False
+    max_age = PAGE_TTL if max_age is None else max_age
+    return time.time() - meta.get('fetched_at', 0) < max_age
+
+
+def load_page(character, max_age=None):
+    """Return the cached page HTML if it is fresh enough, otherwise None"""
+    if not is_fresh(load_page_meta(character), max_age):
+        return None
+    try:
+        with open(_path('pages', _safe_name(character) + '.html'), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def store_page(character, content):
+    """Cache a freshly fetched page and return its revision"""
+    name = _safe_name(character)
+    revision = page_revision(content) or f"t{int(time.time())}"
+    _write_atomic(_path('pages', name + '.html'), content)
+    _write_atomic(_path('pages', name + '.json'), json.dumps({
+        'character': character,
+        'fetched_at': time.time(),
+        'revision': revision
+    }))
+    return revision
+
+
+def load_result(character, section, subsection):
+    """Return a cached lookup result if it was built from the current fresh page"""
+    meta = load_page_meta(character)
+    if not is_fresh(meta):
+        return None
+    results = _read_json(_path('results', _safe_name(character) + '.json'))
+    if not results or results.get('revision') != meta.get('revision'):
+        return None
+    return results['lookups'].get(result_key(section, subsection))
+
+
+def store_result(character, section, subsection, result):
+    """Cache a lookup result against the revision of the currently cached page"""
+    meta = load_page_meta(character)
+    if not meta:
+        return
+    path = _path('results', _safe_name(character) + '.json')
+    results = _read_json(path)
+    if not results or results.get('revision') != meta.get('revision'):
+        # The page changed since these were built, start over
+        results = {'revision': meta.get('revision'), 'lookups': {}}
+    results['lookups'][result_key(section, subsection)] = result
+    _write_atomic(path, json.dumps(results))
+
+
+def load_images(character):
+    """Return the verified image index if it was built from the current fresh page"""
+    meta = load_page_meta(character)
+    if not is_fresh(meta):
+        return None
+    images = _read_json(_path('images', _safe_name(character) + '.json'))
+    if not images or images.get('revision') != meta.get('revision'):
+        return None
+    return images['moves']
+
+
+def store_images(character, moves):
+    """Add verified move images to the index for the revision of the currently cached page"""
+    meta = load_page_meta(character)
+    if not meta:
+        return
+    path = _path('images', _safe_name(character) + '.json')
+    images = _read_json(path)
+    if not images or images.get('revision') != meta.get('revision'):
+        # The page changed since these were verified, start over
+        images = {'revision': meta.get('revision'), 'moves': {}}
+    images['moves'].update(moves)
+    _write_atomic(path, json.dumps(images))
+
+
+def _history_line(ts, character, section, subsection):
+    return json.dumps({
+        'ts': ts,
+        'character': character,
+        'section': section,
+        'subsection': subsection
+    }) + '\n'
+
+
+def _history_paths():
+    """The history files, oldest lookups first"""
+    return [_path(HISTORY_COMPACTED_FILE), _path(HISTORY_PENDING_FILE), _path(HISTORY_FILE)]
+
+
+def record_lookup(character, section, subsection):
+    """Append a lookup to the history used to rank characters for warm-up"""
+    if not any(os.path.exists(path) for path in reversed(_history_paths())):
+        seed_history()
+    with open(_path(HISTORY_FILE), 'a', encoding='utf-8') as f:
+        f.write(_history_line(time.time(), character, section, subsection))
+        size = f.tell()
+    if size > HISTORY_MAX_BYTES:
+        compact_history()
+
+
+def split_section(text):
+    """Split the "<section> <subsection>" part of a log record"""
+    for section in KNOWN_SECTIONS:
+        if text.lower().startswith(section.lower()):
+            return section, text[len(section):].strip()
+    return None, text.strip()
+
+
+def parse_log_records(lines):
+    """Yield (character, section, subsection) from scraper.log-style lines"""
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.startswith('{'):
+            # JSON lines written by scraper_logging
+            try:
+                line = json.loads(line).get('msg', '')
+            except ValueError:
+                continue
+        match = _LOG_LOOKUP_RE.search(line)
+        if match:
+            section, subsection = split_section(match.group(2))
+            yield match.group(1), section, subsection
+
+
+def seed_history(seed_log=None):
+    """Start the lookup history from the lookups recorded in the scraper log"""
+    seed_log = SEED_LOG_FILE if seed_log is None else seed_log
+    seeded = []
+    if seed_log and os.path.exists(seed_log):
+        # Include rotated logs, oldest (highest suffix) first
+        rotated = [p for p in glob.glob(glob.escape(seed_log) + '.*') if p.rsplit('.', 1)[1].isdigit()]
+        rotated.sort(key=lambda p: -int(p.rsplit('.', 1)[1]))
+        for path in rotated + [seed_log]:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                seeded.extend(parse_log_records(f))
+
+    # Seeded lookups count as recent so they age out with the rest of the window
+    now = time.time()
+    _write_atomic(_path(HISTORY_COMPACTED_FILE), ''.join(_history_line(now, *record) for record in seeded))
+
+
+def _read_history(paths):
+    records = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return records
+
+
+def _recent(records):
+    cutoff = time.time() - HISTORY_MAX_AGE
+    return [r for r in records if r.get('ts', 0) >= cutoff][-HISTORY_MAX_RECORDS:]
+
+
+def compact_history():
+    """Keep the history files bounded without losing concurrent appends
+
+    Appends take no lock, so the live file is never rewritten in place.
+    Once it grows past HISTORY_MAX_BYTES it is renamed aside, and it is
+    only folded into the compacted file (dropping lookups outside the
+    window) on a later call, after any process that still had it open
+    has finished writing. A lock file keeps compactions from overlapping.
+    """
+    lock_path = _path(HISTORY_LOCK_FILE)
+    if not acquire_lock(lock_path):
+        return
+    try:
+        live, pending, compacted = _path(HISTORY_FILE), _path(HISTORY_PENDING_FILE), _path(HISTORY_COMPACTED_FILE)
+        if os.path.exists(pending):
+            if time.time() - os.path.getmtime(pending) < HISTORY_SETTLE_TIME:
+                return
+            _write_atomic(compacted, ''.join(
+                _history_line(r['ts'], r['character'], r.get('section'), r.get('subsection'))
+                for r in _recent(_read_history([compacted, pending]))
+            ))
+            os.remove(pending)
+        if os.path.exists(live) and os.path.getsize(live) > HISTORY_MAX_BYTES:
+            os.replace(live, pending)
+    except OSError:
+        # A file is held by another process (Windows); try again next time
+        pass
+    finally:
+        release_lock(lock_path)
+
+
+def load_history():
+    """Load the recent lookups, seeding the history from the scraper log on first use
+
+    Lookups outside the HISTORY_MAX_AGE window or beyond the last
+    HISTORY_MAX_RECORDS are left out.
+    """
+    if not any(os.path.exists(path) for path in _history_paths()):
+        seed_history()
+    compact_history()
+    return [
+        (r['character'], r.get('section'), r.get('subsection') or '')
+        for r in _recent(_read_history(_history_paths()))
+    ]
+
+
+def rank_characters(history):
+    """Characters ordered by how often they were looked up, most popular first
+
+    Spellings that share a cached page ("zeta", "Zeta") count as one
+    character, named by its most common spelling.
+    """
+    counts = Counter(h[0] for h in history)
+    pages = Counter()
+    spellings = {}
+    for character, count in counts.most_common():
+        name = _safe_name(character)
+        pages[name] += count
+        spellings.setdefault(name, character)
+    return [spellings[name] for name, _ in pages.most_common()]
+
+
+def popular_lookups(history, character, limit=None):
+    """The (section, subsection) lookups seen for a character, most popular first"""
+    name = _safe_name(character)
+    counts = Counter(
+        (section, subsection) for looked_up, section, subsection in history
+        if section and subsection and _safe_name(looked_up) == name
+    )
+    return [lookup for lookup, _ in counts.most_common(limit)]
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import atexit
+import random
+import logging
+import contextvars
+from contextlib import contextmanager
+import scraper_cache
+
+LOG_FILE = os.environ.get('SCRAPER_LOG_FILE', 'scraper.log')
+LOG_LEVEL = os.environ.get('SCRAPER_LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.environ.get('SCRAPER_LOG_MAX_BYTES', 5 * 1024 * 1024))
+LOG_BACKUPS = int(os.environ.get('SCRAPER_LOG_BACKUPS', 3))
+# Seconds to keep appending without trying to rotate after a rotation failed
+ROTATE_RETRY_DELAY = 60
+# Fraction of requests whose DEBUG events are kept (INFO and above are always kept)
+DEBUG_SAMPLE_RATE = float(os.environ.get('SCRAPER_DEBUG_SAMPLE_RATE', 1.0))
+
+_request_id = contextvars.ContextVar('request_id', default=None)
+_stage = contextvars.ContextVar('stage', default=None)
+_sample_draw = contextvars.ContextVar('sample_draw', default=None)
+_listener = None
+
+
+@contextmanager
+def request_context(request_id=None):
+    """Tag every record logged inside the block with one request id"""
+    import uuid
+    tokens = [
+        _request_id.set(request_id or uuid.uuid4().hex[:12]),
+        # One draw per request so a sampled request keeps its whole debug trace
+        _sample_draw.set(random.random()),
+    ]
+    try:
+        yield _request_id.get()
+    finally:
+        _sample_draw.reset(tokens[1])
+        _request_id.reset(tokens[0])
+
+
+@contextmanager
+def stage(name):
+    """Tag every record logged inside the block with a processing stage"""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current request id and stage onto records
+
+    Must stay on the QueueHandler: it runs on the caller's thread, which is
+    where the context variables are set, not on the listener thread.
+    """
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        record.stage = _stage.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Drops DEBUG records for requests (or, outside a request, events) that weren't sampled"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        draw = _sample_draw.get()
+        if draw is None:
+            draw = random.random()
+        return draw < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'stage': getattr(record, 'stage', None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry)
+
+
+class SharedRotatingFileHandler(logging.Handler):
+    """Appends to a log file shared by several processes and rotates it by size
+
+    Every process that logs (each bot lookup and the scheduler) checks the
+    size before writing, so the file stays bounded whichever of them run.
+    The file is only open while a record is written, so no process keeps it
+    locked on Windows, and a lock file lets one process rotate at a time.
+    """
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, encoding='utf-8'):
+        super().__init__()
+        self.filename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.encoding = encoding
+        self.retry_at = 0
+
+    def size(self):
+        try:
+            return os.path.getsize(self.filename)
+        except OSError:
+            return 0
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + '\n').encode(self.encoding)
+            if self.max_bytes > 0 and self.size() >= self.max_bytes:
+                self.rotate()
+            with open(self.filename, 'ab') as f:
+                f.write(data)
+        except Exception:
+            self.handleError(record)
+
+    def rotate(self):
+        """Move the log to .1, shifting older backups along and dropping the oldest
+
+        The log is renamed aside before any backup is touched, so a log that
+        can't be moved (Windows, while another process writes it) leaves the
+        backups as they were. A rotation that fails half-way is finished by
+        the next one.
+        """
+        now = time.time()
+        if now < self.retry_at:
+            return
+        lock_path = self.filename + '.lock'
+        if not scraper_cache.acquire_lock(lock_path):
+            # Another process is rotating
+            return
+        try:
+            claimed = self.filename + '.rotating'
+            if not os.path.exists(claimed):
+                if self.size() < self.max_bytes:
+                    # Another process rotated it first
+                    return
+                os.rename(self.filename, claimed)
+            for i in range(self.backups - 1, 0, -1):
+                backup = f"{self.filename}.{i}"
+                if os.path.exists(backup):
+                    os.replace(backup, f"{self.filename}.{i + 1}")
+            if self.backups > 0:
+                os.replace(claimed, self.filename + '.1')
+            else:
+                os.remove(claimed)
+        except OSError:
+            # Keep appending to the current file and try again later
+            self.retry_at = now + ROTATE_RETRY_DELAY
+        finally:
+            scraper_cache.release_lock(lock_path)
+
+
+def setup_logging(log_file=LOG_FILE, level=LOG_LEVEL, sample_rate=DEBUG_SAMPLE_RATE):
+    """Route logging through a queue to a JSON log file and stderr
+
+    Callers only pay for putting a record on the queue; formatting and disk
+    writes happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    # Imported here so one-shot lookups answered from the cache never pay for them
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    class PreformattedQueueHandler(QueueHandler):
+        """QueueHandler that keeps the message args so the listener formats them, not the caller"""
+
+        def prepare(self, record):
+            # Render tracebacks now, while the frames they point at are still current
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            return record
+
+    file_handler = SharedRotatingFileHandler(log_file)
+    file_handler.setFormatter(JsonFormatter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = PreformattedQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(sample_rate))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import scheduler
+import scraper
+import scraper_cache
+
+REFERENCE_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'References.html')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def test_request_budget_allows_up_to_limit_then_waits():
+    budget = scheduler.RequestBudget(2, 60)
+    assert budget.wait_time(now=100) == 0
+    budget.sent.extend([100, 110])
+    assert budget.wait_time(now=120) == 40
+    # The oldest request leaves the window after the period
+    assert budget.wait_time(now=160) == 0
+    assert list(budget.sent) == [110]
+
+
+def test_refresh_survives_unexpected_errors(monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(scheduler, 'warm_character', fail)
+    warmup = scheduler.WarmupScheduler(jitter=0, budget=scheduler.RequestBudget(10, 60))
+    assert warmup.refresh('Vikala') == scheduler.RETRY_DELAY
+
+
+def test_every_request_of_a_refresh_is_charged_to_the_budget(monkeypatch):
+    checked = []
+
+    def fetch_page(character, use_cache=True):
+        with open(REFERENCE_PAGE, 'rb') as f:
+            content = f.read()
+        scraper_cache.store_page(character, content)
+        return content
+
+    def check(session, url):
+        checked.append(url)
+        return 'ok', None
+
+    monkeypatch.setattr(scraper, 'fetch_page', fetch_page)
+    monkeypatch.setattr(scraper, 'check_image_url', check)
+    budget = scheduler.RequestBudget(1000, 60)
+
+    assert scheduler.warm_character('Vikala', [('Normal Moves', 'c.L')], budget, image_moves=3) == 1
+    # The page, then two images for c.L and at most two for each of the 3 indexed moves
+    assert 2 < len(checked) <= 8
+    assert len(budget.sent) == 1 + len(checked)
@@ -0,0 +1,175 @@
+import os
+import struct
+
+import pytest
+from bs4 import BeautifulSoup
+from requests.exceptions import ConnectTimeout
+
+import scraper
+import scraper_cache
+import scraper_logging
+
+REFERENCE_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'References.html')
+
+FULL_RES = 'https://www.dustloop.com/wiki/images/6/6f/GBVSR_Vikala_cL.png'
+THUMBNAIL = 'https://www.dustloop.com/wiki/images/thumb/6/6f/GBVSR_Vikala_cL.png/194px-GBVSR_Vikala_cL.png'
+
+
+def png_header(width, height):
+    return b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + struct.pack('>II', width, height)
+
+
+@pytest.fixture(scope='module')
+def soup():
+    with open(REFERENCE_PAGE, 'rb') as f:
+        return BeautifulSoup(f.read(), 'html.parser')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+def stub_checks(monkeypatch, answers):
+    """Replace the network check with a lookup in answers (url -> (status, size))"""
+    checked = []
+
+    def check(session, url):
+        checked.append(url)
+        return answers.get(url, ('ok', None))
+
+    monkeypatch.setattr(scraper, 'check_image_url', check)
+    return checked
+
+
+def cl_images(soup):
+    return scraper.move_image_candidates(scraper.find_move_section(soup, 'Normal Moves', 'c.L'))
+
+
+def test_full_resolution_is_preferred_and_sized(soup, monkeypatch):
+    stub_checks(monkeypatch, {FULL_RES: ('ok', (1000, 1080))})
+    images = scraper.resolve_images({'cl': cl_images(soup)})['cl']
+    assert images['standard'] == {'url': FULL_RES, 'width': 1000, 'height': 1080, 'verified': True}
+    assert images['hitbox']['url'].endswith('/1/15/GBVSR_Vikala_cL_Hitbox.png')
+
+
+def test_broken_full_resolution_falls_back_to_thumbnail(soup, monkeypatch):
+    checked = stub_checks(monkeypatch, {FULL_RES: ('broken', None)})
+    images = scraper.resolve_images({'cl': cl_images(soup)})['cl']
+    assert images['standard'] == {'url': THUMBNAIL, 'width': 194, 'height': 210, 'verified': True}
+    assert checked.index(FULL_RES) < checked.index(THUMBNAIL)
+
+
+def test_missing_everywhere_resolves_to_no_image(soup, monkeypatch):
+    stub_checks(monkeypatch, {FULL_RES: ('broken', None), THUMBNAIL: ('broken', None)})
+    images = scraper.resolve_images({'cl': cl_images(soup)})['cl']
+    assert images['standard'] is None
+    assert scraper.images_verified(images)
+
+
+def test_inconclusive_check_is_used_unverified_and_not_cached(soup, monkeypatch):
+    stub_checks(monkeypatch, {FULL_RES: ('unknown', None)})
+    scraper_cache.store_page('Vikala', b'"wgCurRevisionId":504432')
+
+    result = scraper.lookup_move(soup, 'Vikala', 'Normal Moves', 'c.L')
+    scraper.index_page_images(soup, 'Vikala')
+
+    assert result['image_url'] == FULL_RES
+    assert result['images']['standard']['verified'] is False
+    assert not scraper.images_verified(result['images'])
+    assert 'normalmoves|cl' not in scraper_cache.load_images('Vikala')
+    assert 'normalmoves|cm' in scraper_cache.load_images('Vikala')
+
+
+def test_lookup_checks_only_the_requested_move(soup, monkeypatch):
+    checked = stub_checks(monkeypatch, {})
+    scraper_cache.store_page('Vikala', b'"wgCurRevisionId":504432')
+
+    scraper.lookup_move(soup, 'Vikala', 'Normal Moves', 'c.L')
+    assert len(checked) == 2
+    assert list(scraper_cache.load_images('Vikala')) == ['normalmoves|cl']
+
+    # The page index only checks the moves that aren't indexed yet, and only once
+    assert scraper.index_page_images(soup, 'Vikala') > 0
+    assert checked.count(FULL_RES) == 1
+    total = len(checked)
+    scraper.lookup_move(soup, 'Vikala', 'Normal Moves', 'c.L')
+    assert scraper.index_page_images(soup, 'Vikala') == 0
+    assert len(checked) == total
+
+
+def test_image_checks_keep_the_request_context(monkeypatch):
+    seen = []
+
+    def check(session, url):
+        seen.append((scraper_logging._request_id.get(), scraper_logging._stage.get()))
+        return 'ok', None
+
+    monkeypatch.setattr(scraper, 'check_image_url', check)
+    with scraper_logging.request_context('abc123'), scraper_logging.stage('images'):
+        scraper.verify_image_urls([FULL_RES, THUMBNAIL])
+    assert seen == [('abc123', 'images')] * 2
+
+
+def test_check_image_url_classifies_responses():
+    class Raw:
+        def __init__(self, data):
+            self.data = data
+
+        def read(self, size, decode_content=True):
+            return self.data[:size]
+
+    class Response:
+        def __init__(self, status, content_type='image/png', data=b''):
+            self.status_code = status
+            self.headers = {'Content-Type': content_type}
+            self.raw = Raw(data)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    class Session:
+        def __init__(self, response):
+            self.response = response
+
+        def get(self, url, **kwargs):
+            if isinstance(self.response, Exception):
+                raise self.response
+            return self.response
+
+    check = scraper.check_image_url
+    assert check(Session(Response(206, data=png_header(640, 480))), FULL_RES) == ('ok', (640, 480))
+    assert check(Session(Response(404)), FULL_RES) == ('broken', None)
+    assert check(Session(Response(200, 'text/html')), FULL_RES) == ('broken', None)
+    assert check(Session(Response(429)), FULL_RES) == ('unknown', None)
+    assert check(Session(ConnectTimeout('timed out')), FULL_RES) == ('unknown', None)
+
+
+def test_image_size_reads_common_formats():
+    assert scraper.image_size(png_header(1000, 1080)) == (1000, 1080)
+    assert scraper.image_size(b'GIF89a' + struct.pack('<HH', 32, 16)) == (32, 16)
+    jpeg = b'\xff\xd8' + b'\xff\xe0\x00\x04\x00\x00' + b'\xff\xc0\x00\x11\x08' + struct.pack('>HH', 720, 1280)
+    assert scraper.image_size(jpeg) == (1280, 720)
+    assert scraper.image_size(b'not an image') is None
+
+
+def test_failed_cache_write_does_not_fail_the_lookup(monkeypatch):
+    stub_checks(monkeypatch, {})
+    with open(REFERENCE_PAGE, 'rb') as f:
+        scraper_cache.store_page('Vikala', f.read())
+    replace = os.replace
+
+    def locked(src, dst):
+        if 'results' in dst:
+            raise PermissionError('in use by another process')
+        replace(src, dst)
+
+    monkeypatch.setattr(scraper_cache.os, 'replace', locked)
+    result = scraper.scrape_uncached('Vikala', 'Normal Moves', 'c.L')
+
+    assert result['image_url'] == FULL_RES
+    results_dir = os.path.join(scraper_cache.CACHE_DIR, 'results')
+    assert not os.path.exists(results_dir) or os.listdir(results_dir) == []
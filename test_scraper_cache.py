@@ -0,0 +1,120 @@
+import os
+import json
+import time
+
+import pytest
+
+import scraper_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(scraper_cache, 'SEED_LOG_FILE', str(tmp_path / 'scraper.log'))
+    return tmp_path
+
+
+def page(revision):
+    return f'<script>"wgCurRevisionId":{revision}</script>'.encode()
+
+
+def test_split_section_known_and_unknown():
+    assert scraper_cache.split_section('Unique Action Dream Come True') == ('Unique Action', 'Dream Come True')
+    assert scraper_cache.split_section('skills 22L') == ('Skills', '22L')
+    assert scraper_cache.split_section('ultimate 236U') == (None, 'ultimate 236U')
+
+
+def test_parse_log_records_reads_plain_and_json_lines():
+    lines = [
+        "2025-04-06 18:11:30,648 - __main__ - INFO - Scraping data for Zeta - Normal Moves c.L\n",
+        "2025-04-06 18:16:19,610 - __main__ - ERROR - Subsection '5U' not found in 'Unique Action'\n",
+        json.dumps({'level': 'INFO', 'msg': 'Scraping data for Avatar Belial - Skills 236L'}) + '\n',
+        '{not json\n',
+    ]
+    assert list(scraper_cache.parse_log_records(lines)) == [
+        ('Zeta', 'Normal Moves', 'c.L'),
+        ('Avatar Belial', 'Skills', '236L'),
+    ]
+
+
+def test_result_is_dropped_when_page_revision_changes():
+    scraper_cache.store_page('Vikala', page(1))
+    scraper_cache.store_result('Vikala', 'Skills', '22L', {'frame_data': {'Damage': '800'}})
+    assert scraper_cache.load_result('Vikala', 'skills', '22l') == {'frame_data': {'Damage': '800'}}
+
+    scraper_cache.store_page('Vikala', page(2))
+    assert scraper_cache.load_result('Vikala', 'Skills', '22L') is None
+
+    # New results start a fresh set for the new revision
+    scraper_cache.store_result('Vikala', 'Skills', '22M', {'frame_data': {}})
+    assert scraper_cache.load_result('Vikala', 'Skills', '22M') == {'frame_data': {}}
+    assert scraper_cache.load_result('Vikala', 'Skills', '22L') is None
+
+
+def test_result_is_dropped_when_page_is_stale(monkeypatch):
+    scraper_cache.store_page('Vikala', page(1))
+    scraper_cache.store_result('Vikala', 'Skills', '22L', {'frame_data': {}})
+    monkeypatch.setattr(scraper_cache, 'PAGE_TTL', 0)
+    assert scraper_cache.load_result('Vikala', 'Skills', '22L') is None
+
+
+def test_history_is_seeded_from_log_and_ranked(cache_dir):
+    (cache_dir / 'scraper.log').write_text(
+        "x - INFO - Scraping data for Zeta - Normal Moves c.L\n"
+        "x - INFO - Scraping data for Vikala - Skills 22L\n"
+        "x - INFO - Scraping data for Vikala - Skills 22L\n"
+    )
+    scraper_cache.record_lookup('Vikala', 'Skills', '236L')
+    history = scraper_cache.load_history()
+    assert scraper_cache.rank_characters(history) == ['Vikala', 'Zeta']
+    assert scraper_cache.popular_lookups(history, 'Vikala') == [('Skills', '22L'), ('Skills', '236L')]
+
+
+def history_lines():
+    lines = []
+    for path in scraper_cache._history_paths():
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                lines.extend(f.readlines())
+    return lines
+
+
+def test_history_is_capped_and_compacted(monkeypatch):
+    monkeypatch.setattr(scraper_cache, 'HISTORY_MAX_RECORDS', 2)
+    monkeypatch.setattr(scraper_cache, 'HISTORY_MAX_BYTES', 0)
+    monkeypatch.setattr(scraper_cache, 'HISTORY_SETTLE_TIME', 0)
+    scraper_cache.record_lookup('Gran', 'Normal Moves', '5L')
+    with open(scraper_cache._path(scraper_cache.HISTORY_FILE), 'a', encoding='utf-8') as f:
+        f.write(scraper_cache._history_line(0, 'Old', 'Skills', '22L'))
+    # Every append is over the size limit, so lookups alone keep the files compacted
+    for move in ['5M', '5H', '2L', '2M']:
+        scraper_cache.record_lookup('Gran', 'Normal Moves', move)
+    assert len(history_lines()) <= 4
+
+    history = scraper_cache.load_history()
+    assert history == [('Gran', 'Normal Moves', '2L'), ('Gran', 'Normal Moves', '2M')]
+
+
+def test_compaction_keeps_appends_from_writers_with_the_old_file_open(monkeypatch):
+    monkeypatch.setattr(scraper_cache, 'HISTORY_MAX_BYTES', 0)
+    monkeypatch.setattr(scraper_cache, 'HISTORY_SETTLE_TIME', 0)
+    scraper_cache.record_lookup('Gran', 'Skills', '236L')
+    with open(scraper_cache._path(scraper_cache.HISTORY_FILE), 'a', encoding='utf-8') as writer:
+        scraper_cache.compact_history()
+        writer.write(scraper_cache._history_line(time.time(), 'Zeta', 'Skills', '22L'))
+    scraper_cache.compact_history()
+
+    assert ('Zeta', 'Skills', '22L') in scraper_cache.load_history()
+    assert not os.path.exists(scraper_cache._path(scraper_cache.HISTORY_LOCK_FILE))
+
+
+def test_spellings_of_one_page_are_ranked_together():
+    history = [
+        ('zeta', 'Skills', '22L'),
+        ('Zeta', 'Skills', '22L'),
+        ('Zeta', 'Normal Moves', 'c.L'),
+        ('Vikala', 'Skills', '22L'),
+        ('Vikala', 'Skills', '22L'),
+    ]
+    assert scraper_cache.rank_characters(history) == ['Zeta', 'Vikala']
+    assert scraper_cache.popular_lookups(history, 'Zeta') == [('Skills', '22L'), ('Normal Moves', 'c.L')]
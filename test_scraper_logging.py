@@ -0,0 +1,135 @@
+import os
+import json
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler
+
+import pytest
+
+import scraper_logging
+
+
+def make_record(level, msg='event', *args):
+    return logging.LogRecord('test', level, __file__, 1, msg, args, None)
+
+
+def read_backups(log_file):
+    contents = {}
+    for i in range(1, 4):
+        path = f"{log_file}.{i}"
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                contents[i] = f.read()
+    return contents
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """A logging pipeline writing to a temporary file, torn down after the test"""
+    path = tmp_path / 'scraper.log'
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    listener = scraper_logging.setup_logging(log_file=str(path), level='DEBUG', sample_rate=1.0)
+    yield path
+    if listener._thread is not None:
+        listener.stop()
+    atexit.unregister(listener.stop)
+    scraper_logging._listener = None
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_debug_records_are_sampled_per_request(monkeypatch):
+    monkeypatch.setattr(scraper_logging.random, 'random', lambda: 0.3)
+    kept = scraper_logging.DebugSamplingFilter(0.5)
+    dropped = scraper_logging.DebugSamplingFilter(0.2)
+    with scraper_logging.request_context():
+        assert all(kept.filter(make_record(logging.DEBUG)) for _ in range(5))
+        assert not any(dropped.filter(make_record(logging.DEBUG)) for _ in range(5))
+        # Only DEBUG is sampled
+        assert dropped.filter(make_record(logging.INFO))
+
+
+def test_records_carry_request_id_and_stage(log_file):
+    logger = logging.getLogger('scraper')
+    with scraper_logging.request_context('abc123'):
+        with scraper_logging.stage('fetch'):
+            logger.info("Fetched %s", 'Vikala')
+        logger.warning("Done")
+    logger.info("Outside")
+    scraper_logging._listener.stop()
+
+    with open(log_file, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [(r['msg'], r['request_id'], r['stage']) for r in records] == [
+        ('Fetched Vikala', 'abc123', 'fetch'),
+        ('Done', 'abc123', None),
+        ('Outside', None, None),
+    ]
+
+
+def test_queue_handler_leaves_formatting_to_the_listener(log_file):
+    class Arg:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return 'arg'
+
+    formatted_on = []
+    queue_handler = next(h for h in logging.getLogger().handlers if isinstance(h, QueueHandler))
+    record = make_record(logging.INFO, 'Lazy %s', Arg())
+    queued = queue_handler.prepare(record)
+    assert (queued.msg, queued.args) == ('Lazy %s', record.args)
+    assert formatted_on == []
+
+    queue_handler.handle(record)
+    scraper_logging._listener.stop()
+    with open(log_file, encoding='utf-8') as f:
+        assert json.loads(f.readline())['msg'] == 'Lazy arg'
+    assert threading.current_thread() not in formatted_on
+
+
+def test_log_rotates_and_keeps_backups(tmp_path):
+    log_file = str(tmp_path / 'scraper.log')
+    handler = scraper_logging.SharedRotatingFileHandler(log_file, max_bytes=100, backups=3)
+    for i in range(50):
+        handler.emit(make_record(logging.INFO, 'record %s', i))
+
+    assert sorted(os.listdir(tmp_path)) == ['scraper.log', 'scraper.log.1', 'scraper.log.2', 'scraper.log.3']
+    assert 'record 49' in open(log_file, encoding='utf-8').read()
+
+
+def test_failed_rotation_keeps_backups(tmp_path, monkeypatch):
+    log_file = str(tmp_path / 'scraper.log')
+    for i in range(1, 4):
+        with open(f"{log_file}.{i}", 'w', encoding='utf-8') as f:
+            f.write(f"backup {i}\n")
+    with open(log_file, 'w', encoding='utf-8') as f:
+        f.write('x' * 200 + '\n')
+
+    def locked(src, dst):
+        raise PermissionError('in use by another process')
+
+    monkeypatch.setattr(scraper_logging.os, 'rename', locked)
+    handler = scraper_logging.SharedRotatingFileHandler(log_file, max_bytes=100, backups=3)
+    for i in range(5):
+        handler.emit(make_record(logging.INFO, 'record %s', i))
+
+    assert read_backups(log_file) == {i: f"backup {i}\n" for i in range(1, 4)}
+    assert 'record 4' in open(log_file, encoding='utf-8').read()
+    assert handler.retry_at > 0
+    assert not os.path.exists(log_file + '.lock')
+
+
+def test_half_finished_rotation_is_completed(tmp_path):
+    log_file = str(tmp_path / 'scraper.log')
+    # A rotation that claimed the log and moved .2 to .3, then failed moving .1
+    for name, text in [('.rotating', 'newest\n'), ('.1', 'older\n'), ('.3', 'oldest\n'), ('', 'x' * 200 + '\n')]:
+        with open(log_file + name, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    handler = scraper_logging.SharedRotatingFileHandler(log_file, max_bytes=100, backups=3)
+    handler.emit(make_record(logging.INFO, 'record'))
+
+    assert read_backups(log_file) == {1: 'newest\n', 2: 'older\n', 3: 'oldest\n'}
+    assert not os.path.exists(log_file + '.rotating')